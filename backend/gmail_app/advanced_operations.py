@@ -1,3 +1,4 @@
+import hashlib
 import logging
 import json
 from datetime import datetime, timedelta
@@ -19,72 +20,89 @@ class EmailPreviewManager:
         self.user = user
         self.service_manager = GmailServiceManager(user)
     
-    def preview_deletion_query(self, search_query, sample_size=20):
-        """Preview emails that would be deleted by a query"""
+    def preview_deletion_query(self, search_query, sample_size=20, page_token=None):
+        """Preview emails that would be deleted by a query, one page at a time"""
         try:
             service = self.service_manager.get_service()
             if not service:
                 return {'error': 'Gmail service not available'}
-            
-            # Get total count
-            count_result = service.users().messages().list(
-                userId='me',
-                q=search_query,
-                maxResults=1
-            ).execute()
-            
-            total_count = count_result.get('resultSizeEstimate', 0)
-            
-            # Get sample emails for preview
-            preview_result = service.users().messages().list(
-                userId='me',
-                q=search_query,
-                maxResults=sample_size
-            ).execute()
-            
+
+            # The sample goes into a single batch request below, and Gmail
+            # rejects batches with more than 100 sub-requests
+            sample_size = min(sample_size, 100)
+
+            # Get one page of emails for preview - callers pass the returned
+            # next_page_token back in to walk forward, so memory stays O(page)
+            list_params = {
+                'userId': 'me',
+                'q': search_query,
+                'maxResults': sample_size
+            }
+            if page_token:
+                list_params['pageToken'] = page_token
+
+            preview_result = service.users().messages().list(**list_params).execute()
+
             messages = preview_result.get('messages', [])
-            
-            # Get metadata for preview emails
+            next_page_token = preview_result.get('nextPageToken')
+
+            # The list response already carries the count estimate, so the
+            # old dedicated maxResults=1 counting call is gone (later pages
+            # don't report it - storage math is first-page only)
+            total_count = None if page_token else preview_result.get('resultSizeEstimate', 0)
+
+            # Metadata for the sampled messages via one batch call instead
+            # of a round-trip per message - same pattern get_email_metadata
+            # uses (sample_size is clamped to the 100 sub-request limit)
             preview_emails = []
-            for msg in messages[:sample_size]:
-                try:
-                    message = service.users().messages().get(
-                        userId='me',
-                        id=msg['id'],
-                        format='metadata',
-                        metadataHeaders=['From', 'To', 'Subject', 'Date']
-                    ).execute()
-                    
-                    headers = {h['name']: h['value'] for h in message.get('payload', {}).get('headers', [])}
-                    
-                    preview_emails.append({
-                        'id': message['id'],
-                        'from': headers.get('From', 'Unknown'),
-                        'subject': headers.get('Subject', 'No Subject'),
-                        'date': headers.get('Date', 'Unknown'),
-                        'snippet': message.get('snippet', '')[:100] + '...',
-                        'size_estimate': message.get('sizeEstimate', 0)
-                    })
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to get preview for message {msg['id']}: {e}")
-                    continue
+
+            def collect_preview(request_id, response, exception):
+                if exception is not None:
+                    logger.warning("Failed to get preview for message %s: %s", request_id, exception)
+                    return
+
+                headers = {h['name']: h['value'] for h in response.get('payload', {}).get('headers', [])}
+
+                preview_emails.append({
+                    'id': response['id'],
+                    'from': headers.get('From', 'Unknown'),
+                    'subject': headers.get('Subject', 'No Subject'),
+                    'date': headers.get('Date', 'Unknown'),
+                    'snippet': response.get('snippet', '')[:100] + '...',
+                    'size_estimate': response.get('sizeEstimate', 0)
+                })
+
+            if messages:
+                batch = service.new_batch_http_request(callback=collect_preview)
+                for msg in messages[:sample_size]:
+                    batch.add(
+                        service.users().messages().get(
+                            userId='me',
+                            id=msg['id'],
+                            format='metadata',
+                            metadataHeaders=['From', 'To', 'Subject', 'Date']
+                        ),
+                        request_id=msg['id']
+                    )
+                batch.execute()
             
-            # Calculate estimated storage savings
+            # Calculate estimated storage savings (first page only - later
+            # pages don't have the count)
             total_size_estimate = sum([email['size_estimate'] for email in preview_emails])
             avg_size = total_size_estimate / len(preview_emails) if preview_emails else 0
-            estimated_total_size = avg_size * total_count
-            
+            estimated_total_size = avg_size * (total_count or 0)
+
             return {
                 'total_count': total_count,
                 'preview_emails': preview_emails,
                 'sample_size': len(preview_emails),
                 'estimated_storage_mb': round(estimated_total_size / (1024 * 1024), 2),
-                'search_query': search_query
+                'search_query': search_query,
+                'next_page_token': next_page_token
             }
             
         except Exception as e:
-            logger.error(f"Preview error for user {self.user.username}: {e}")
+            logger.error("Preview error for user %s: %s", self.user.username, e)
             return {'error': {'message': str(e), 'type': 'preview_error'}}
     
     def get_deletion_statistics(self, days_back=30):
@@ -108,7 +126,7 @@ class EmailPreviewManager:
             return stats
             
         except Exception as e:
-            logger.error(f"Stats error for user {self.user.username}: {e}")
+            logger.error("Stats error for user %s: %s", self.user.username, e)
             return {'error': str(e)}
 
 class SmartDeletionRules:
@@ -125,12 +143,27 @@ class SmartDeletionRules:
             required_fields = ['name', 'query', 'schedule_days', 'enabled']
             if not all(field in rule_config for field in required_fields):
                 return {'error': 'Missing required rule fields'}
-            
-            # Store rule in cache/database
-            rule_id = f"rule_{self.user.id}_{len(self.get_user_rules())}"
+
+            cache_key = f"deletion_rules_{self.user.id}"
+            user_rules = cache.get(cache_key, [])
+
+            # Content hash over the canonical config - duplicate POSTs get
+            # rejected instead of silently bloating the rule list that
+            # execute_rule scans (rules live in cache, so the hash check
+            # stands in for a DB UNIQUE index)
+            config_hash = hashlib.blake2b(
+                json.dumps(rule_config, sort_keys=True).encode(),
+                digest_size=16
+            ).hexdigest()
+
+            if any(r.get('config_hash') == config_hash for r in user_rules):
+                return {'error': 'An identical rule already exists'}
+
+            rule_id = f"rule_{self.user.id}_{len(user_rules)}"
             rule_data = {
                 'id': rule_id,
                 'user_id': self.user.id,
+                'config_hash': config_hash,
                 'name': rule_config['name'],
                 'query': rule_config['query'],
                 'schedule_days': rule_config['schedule_days'],
@@ -139,18 +172,16 @@ class SmartDeletionRules:
                 'last_run': None,
                 'total_deleted': 0
             }
-            
+
             # Store in cache (in production, use database)
-            cache_key = f"deletion_rules_{self.user.id}"
-            user_rules = cache.get(cache_key, [])
             user_rules.append(rule_data)
             cache.set(cache_key, user_rules, 86400)  # Cache for 24 hours
             
-            logger.info(f"Created deletion rule {rule_id} for user {self.user.username}")
+            logger.info("Created deletion rule %s for user %s", rule_id, self.user.username)
             return {'status': 'created', 'rule': rule_data}
             
         except Exception as e:
-            logger.error(f"Rule creation error: {e}")
+            logger.error("Rule creation error: %s", e)
             return {'error': str(e)}
     
     def get_user_rules(self):
@@ -159,7 +190,7 @@ class SmartDeletionRules:
             cache_key = f"deletion_rules_{self.user.id}"
             return cache.get(cache_key, [])
         except Exception as e:
-            logger.error(f"Get rules error: {e}")
+            logger.error("Get rules error: %s", e)
             return []
     
     def execute_rule(self, rule_id):
@@ -194,7 +225,7 @@ class SmartDeletionRules:
             return result
             
         except Exception as e:
-            logger.error(f"Rule execution error: {e}")
+            logger.error("Rule execution error: %s", e)
             return {'error': str(e)}
 
 class UndoManager:
@@ -232,7 +263,7 @@ class UndoManager:
             return {'status': 'created', 'undo_id': undo_id}
             
         except Exception as e:
-            logger.error(f"Undo point creation error: {e}")
+            logger.error("Undo point creation error: %s", e)
             return {'error': str(e)}
         
     
@@ -285,32 +316,131 @@ class UndoManager:
             return {'error': 'Unknown operation type'}
             
         except Exception as e:
-            logger.error(f"Undo execution error: {e}")
+            logger.error("Undo execution error: %s", e)
             return {'error': str(e)}
         
     
+    def _trim_expired(self, cache_key, undo_points):
+        """Drop expired points from storage, at most once a minute per user.
+
+        Without this the stored list only shrinks via the last-10 cap, so
+        every history call keeps re-parsing and re-filtering dead entries.
+        """
+        lock_key = f"undo_trim_lock_{self.user.id}"
+        if not cache.add(lock_key, 1, 60):
+            return undo_points
+
+        current_time = timezone.now()
+        active_points = [
+            point for point in undo_points
+            if current_time <= datetime.fromisoformat(point['expires_at'].replace('Z', '+00:00'))
+        ]
+
+        if len(active_points) != len(undo_points):
+            cache.set(cache_key, active_points, 86400)
+
+        return active_points
+
     def get_undo_history(self):
         """Get available undo points for user"""
         try:
             cache_key = f"undo_points_{self.user.id}"
             undo_points = cache.get(cache_key, [])
-            
-            # Filter non-expired points
+
+            undo_points = self._trim_expired(cache_key, undo_points)
+
+            # Filter non-expired points (trim may have been skipped by the lock)
             current_time = timezone.now()
             active_points = []
-            
+
             for point in undo_points:
                 expire_time = datetime.fromisoformat(point['expires_at'].replace('Z', '+00:00'))
                 if current_time <= expire_time:
                     active_points.append(point)
-            
+
             return active_points
-            
+
         except Exception as e:
-            logger.error(f"Undo history error: {e}")
+            logger.error("Undo history error: %s", e)
             return []
         
 
+@shared_task
+def preview_deletion_task(user_id, search_query, sample_size, cache_key, page_token=None):
+    """Run a deletion preview off the request thread and cache the payload.
+
+    EmailPreviewView dispatches this and returns the task id immediately;
+    the finished payload lands under the same dedupe cache key the view
+    checks, so a repeat POST (or the task status endpoint) serves it from
+    Redis without another Gmail round-trip.
+    """
+    try:
+        user = User.objects.get(id=user_id)
+        result = EmailPreviewManager(user).preview_deletion_query(search_query, sample_size, page_token=page_token)
+
+        if 'error' in result:
+            payload = {'status': 'error', 'error': result['error']}
+            cache.set(cache_key, payload, 60)
+            return payload
+
+        payload = {
+            'status': 'success',
+            'emails': result.get('preview_emails', []),
+            'total_estimate': result.get('total_count', 0),
+            'sample_count': result.get('sample_size', 0),
+            'estimated_deletion_time': f"{result.get('estimated_storage_mb', 0)} MB",
+            'next_page_token': result.get('next_page_token')
+        }
+        cache.set(cache_key, payload, 300)
+        return payload
+
+    except User.DoesNotExist:
+        return {'status': 'error', 'message': 'User not found'}
+    except Exception as e:
+        logger.error("Preview task error: %s", e)
+        return {'status': 'error', 'message': str(e)}
+
+
+# Stats windows the nightly beat task precomputes for every user
+PRECOMPUTED_STATS_WINDOWS = (7, 30, 90)
+
+
+@shared_task
+def refresh_deletion_stats():
+    """Keep the common stats windows warm so the stats endpoint stays a cache read.
+
+    track_deletion_stats is the source of truth and maintains the 30-day
+    key itself with a 30-day TTL, so this job must never overwrite - it
+    only add()s an empty payload where a window has no entry yet, leaving
+    real tracked stats and their retention untouched. Uncommon days_back
+    values still compute on demand in the view path.
+    """
+    from .models import GoogleOAuthToken
+
+    empty_stats = {
+        'total_deleted': 0,
+        'storage_saved_mb': 0,
+        'deletion_sessions': 0,
+        'most_deleted_category': 'promotions',
+        'avg_emails_per_session': 0
+    }
+
+    warmed = 0
+    for user_id in GoogleOAuthToken.objects.values_list('user_id', flat=True):
+        try:
+            for days_back in PRECOMPUTED_STATS_WINDOWS:
+                # The 30-day window matches track_deletion_stats' retention
+                ttl = 86400 * 30 if days_back == 30 else 86400
+                if cache.add(f"deletion_stats_{user_id}_{days_back}", dict(empty_stats), ttl):
+                    warmed += 1
+
+        except Exception as e:
+            logger.error("Stats warmup failed for user %s: %s", user_id, e)
+
+    logger.info("Warmed %s deletion stat windows", warmed)
+    return {'status': 'completed', 'warmed': warmed}
+
+
 @shared_task
 def execute_scheduled_rules():
     """Celery task to execute scheduled deletion rules"""
@@ -322,5 +452,5 @@ def execute_scheduled_rules():
         return {'status': 'completed', 'rules_executed': 0}
         
     except Exception as e:
-        logger.error(f"Scheduled rules execution error: {e}")
+        logger.error("Scheduled rules execution error: %s", e)
         return {'status': 'error', 'message': str(e)}
\ No newline at end of file
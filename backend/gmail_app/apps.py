@@ -4,3 +4,19 @@ from django.apps import AppConfig
 class GmailAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gmail_app'
+
+    def ready(self):
+        # Build the pooled HTTP session at boot so the first OAuth request
+        # doesn't pay for it (the heavy view module stays lazily imported)
+        from . import http  # noqa: F401
+
+        # Warm the URL-reverse lookup tables so the first reverse() (e.g. the
+        # OAuth callback redirect) doesn't pay for building them. The url
+        # modules reference views by dotted string, so this loads routes
+        # without pulling in the view module.
+        try:
+            from django.urls import get_resolver
+            get_resolver()._populate()
+        except Exception:
+            # Never block startup over a warm-up step
+            pass
@@ -0,0 +1,46 @@
+"""Custom path converters so malformed ids are rejected by the URL layer's
+precompiled regexes instead of reaching Python view code."""
+
+
+class GmailIdConverter:
+    """Gmail message ids are short hex strings"""
+    regex = '[0-9a-fA-F]{1,32}'
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
+
+
+class TaskIdConverter:
+    """Celery task ids are UUID-style hex with dashes"""
+    regex = '[0-9a-fA-F-]{1,64}'
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
+
+
+class RuleIdConverter:
+    """Rule ids look like rule_<user_id>_<n> (see SmartDeletionRules)"""
+    regex = r'rule_\d+_\d+'
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
+
+
+class UndoIdConverter:
+    """Undo ids look like undo_<user_id>_<timestamp> (see UndoManager)"""
+    regex = r'undo_\d+_\d+'
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
@@ -1,21 +1,83 @@
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Optional
-from celery import shared_task
+import google_auth_httplib2
+from celery import chord, shared_task
 from django.contrib.auth.models import User
 from googleapiclient.errors import HttpError
+from googleapiclient.http import build_http
 from .gmail_utils import GmailServiceManager, handle_gmail_api_error, retry_gmail_operation
 from .models import GoogleOAuthToken
 import time
 
 logger = logging.getLogger(__name__)
 
+# Concurrent Gmail calls per bulk operation - kept small to stay inside
+# the per-user quota (250 units/second)
+MAX_PARALLEL_BATCHES = 4
+
 class EmailDeletionManager:
     """Manager for email deletion operations"""
-    
+
     def __init__(self, user):
         self.user = user
         self.service_manager = GmailServiceManager(user)
-    
+
+    def _run_batches_parallel(self, batches, make_request, action_label):
+        """Run per-batch Gmail calls on a bounded thread pool.
+
+        Gmail tolerates a few concurrent requests per user, so batches run
+        side by side instead of serially with sleeps in between. Each worker
+        thread executes against its own authorized transport - httplib2
+        connections can't be shared across threads.
+        """
+        from .utils import get_credentials_for_user
+
+        total_successful = 0
+        total_failed = 0
+        all_errors = []
+
+        credentials = get_credentials_for_user(self.user)
+        local = threading.local()
+
+        def run_batch(batch_ids):
+            if not hasattr(local, 'http'):
+                local.http = google_auth_httplib2.AuthorizedHttp(credentials, http=build_http())
+            try:
+                make_request(batch_ids).execute(http=local.http)
+            except HttpError as e:
+                if e.resp.status != 429:
+                    raise
+                # Back off inside the worker so the retry - and this
+                # thread's next batch - actually waits out the rate limit
+                time.sleep(2.0)
+                make_request(batch_ids).execute(http=local.http)
+
+        with ThreadPoolExecutor(max_workers=MAX_PARALLEL_BATCHES) as pool:
+            futures = {
+                pool.submit(run_batch, batch_ids): (batch_number, batch_ids)
+                for batch_number, batch_ids in enumerate(batches, 1)
+            }
+
+            for future in as_completed(futures):
+                batch_number, batch_ids = futures[future]
+                try:
+                    future.result()
+                    total_successful += len(batch_ids)
+                    logger.info("%s batch %s completed: %s emails", action_label, batch_number, len(batch_ids))
+
+                except HttpError as e:
+                    logger.error("%s batch error: %s", action_label, e)
+                    total_failed += len(batch_ids)
+                    all_errors.append({
+                        'batch': batch_number,
+                        'error': str(e),
+                        'message_count': len(batch_ids)
+                    })
+
+        return total_successful, total_failed, all_errors
+
     def delete_single_email(self, message_id, permanent=False):
         """Delete a single email (trash or permanent)"""
         try:
@@ -32,7 +94,7 @@ class EmailDeletionManager:
                 
                 retry_gmail_operation(delete_operation)
                 
-                logger.info(f"Permanently deleted email {message_id} for user {self.user.username}")
+                logger.info("Permanently deleted email %s for user %s", message_id, self.user.username)
                 return {
                     'status': 'success',
                     'message_id': message_id,
@@ -47,7 +109,7 @@ class EmailDeletionManager:
                 
                 result = retry_gmail_operation(trash_operation)
                 
-                logger.info(f"Moved email {message_id} to trash for user {self.user.username}")
+                logger.info("Moved email %s to trash for user %s", message_id, self.user.username)
                 return {
                     'status': 'success',
                     'message_id': message_id,
@@ -64,10 +126,10 @@ class EmailDeletionManager:
                 }
             
             error_info = handle_gmail_api_error(e, "delete email")
-            logger.error(f"Delete email error for user {self.user.username}: {error_info}")
+            logger.error("Delete email error for user %s: %s", self.user.username, error_info)
             return {'error': error_info}
         except Exception as e:
-            logger.error(f"Unexpected delete error for user {self.user.username}: {e}")
+            logger.error("Unexpected delete error for user %s: %s", self.user.username, e)
             return {'error': {'message': str(e), 'type': 'unknown'}}
     
     def recover_email(self, message_id):
@@ -85,7 +147,7 @@ class EmailDeletionManager:
             
             result = retry_gmail_operation(untrash_operation)
             
-            logger.info(f"Recovered email {message_id} from trash for user {self.user.username}")
+            logger.info("Recovered email %s from trash for user %s", message_id, self.user.username)
             return {
                 'status': 'success',
                 'message_id': message_id,
@@ -102,10 +164,10 @@ class EmailDeletionManager:
                 }
             
             error_info = handle_gmail_api_error(e, "recover email")
-            logger.error(f"Recover email error for user {self.user.username}: {error_info}")
+            logger.error("Recover email error for user %s: %s", self.user.username, error_info)
             return {'error': error_info}
         except Exception as e:
-            logger.error(f"Unexpected recover error for user {self.user.username}: {e}")
+            logger.error("Unexpected recover error for user %s: %s", self.user.username, e)
             return {'error': {'message': str(e), 'type': 'unknown'}}
         
 
@@ -116,54 +178,34 @@ class EmailDeletionManager:
             if not service:
                 return {'error': 'Gmail service not available'}
             
-            total_successful = 0
-            total_failed = 0
-            all_errors = []
-            
-            # Process in batches of 1000 (batchModify limit)
-            for i in range(0, len(message_ids), batch_size):
-                batch_ids = message_ids[i:i + batch_size]
-                
-                try:
-                    if permanent:
-                        # For permanent deletion, use batchDelete if available
-                        # or fall back to individual delete calls
-                        for msg_id in batch_ids:
-                            service.users().messages().delete(
-                                userId='me',
-                                id=msg_id   
-                            ).execute()
-                            time.sleep(0.01)  # Minimal delay
-                    else:
-                        # Fast trash using batchModify
-                        service.users().messages().batchModify(
-                            userId='me',
-                            body={
-                                'ids': batch_ids,
-                                'addLabelIds': ['TRASH'],
-                                'removeLabelIds': ['INBOX']
-                            }
-                        ).execute()
-                    
-                    total_successful += len(batch_ids)
-                    logger.info(f"Fast batch {i//batch_size + 1} completed: {len(batch_ids)} emails")
-                    
-                except HttpError as e:
-                    logger.error(f"Fast batch error: {e}")
-                    total_failed += len(batch_ids)
-                    all_errors.append({
-                        'batch': i//batch_size + 1,
-                        'error': str(e),
-                        'message_count': len(batch_ids)
-                    })
-                    
-                    # Rate limit handling
-                    if e.resp.status == 429:
-                        time.sleep(2.0)
-                
-                # Small delay between batches
-                time.sleep(0.1)
-            
+            # Batches of up to 1000 (batchModify/batchDelete limit), run in
+            # parallel on the bounded pool
+            batches = [message_ids[i:i + batch_size] for i in range(0, len(message_ids), batch_size)]
+
+            if permanent:
+                def make_request(batch_ids):
+                    # batchDelete takes up to 1000 ids per call - one
+                    # round-trip instead of one per message
+                    return service.users().messages().batchDelete(
+                        userId='me',
+                        body={'ids': batch_ids}
+                    )
+            else:
+                def make_request(batch_ids):
+                    # Fast trash using batchModify
+                    return service.users().messages().batchModify(
+                        userId='me',
+                        body={
+                            'ids': batch_ids,
+                            'addLabelIds': ['TRASH'],
+                            'removeLabelIds': ['INBOX']
+                        }
+                    )
+
+            total_successful, total_failed, all_errors = self._run_batches_parallel(
+                batches, make_request, 'Fast batch'
+            )
+
             return {
                 'status': 'completed',
                 'total': len(message_ids),
@@ -174,7 +216,7 @@ class EmailDeletionManager:
             }
             
         except Exception as e:
-            logger.error(f"Fast batch delete error: {e}")
+            logger.error("Fast batch delete error: %s", e)
             return {'error': {'message': str(e), 'type': 'fast_batch_error'}}
         
 
@@ -185,44 +227,25 @@ class EmailDeletionManager:
             if not service:
                 return {'error': 'Gmail service not available'}
             
-            total_successful = 0
-            total_failed = 0
-            all_errors = []
-            
-            # Process in batches of 1000 (batchModify limit)
-            for i in range(0, len(message_ids), batch_size):
-                batch_ids = message_ids[i:i + batch_size]
-                
-                try:
-                    # Fast recovery using batchModify
-                    service.users().messages().batchModify(
-                        userId='me',
-                        body={
-                            'ids': batch_ids,
-                            'removeLabelIds': ['TRASH'],
-                            'addLabelIds': ['INBOX']  # Move back to inbox
-                        }
-                    ).execute()
-                    
-                    total_successful += len(batch_ids)
-                    logger.info(f"Fast recovery batch {i//batch_size + 1} completed: {len(batch_ids)} emails")
-                    
-                except HttpError as e:
-                    logger.error(f"Fast recovery batch error: {e}")
-                    total_failed += len(batch_ids)
-                    all_errors.append({
-                        'batch': i//batch_size + 1,
-                        'error': str(e),
-                        'message_count': len(batch_ids)
-                    })
-                    
-                    # Rate limit handling
-                    if e.resp.status == 429:
-                        time.sleep(2.0)
-                
-                # Small delay between batches
-                time.sleep(0.1)
-            
+            # Batches of up to 1000 (batchModify limit), run in parallel on
+            # the bounded pool
+            batches = [message_ids[i:i + batch_size] for i in range(0, len(message_ids), batch_size)]
+
+            def make_request(batch_ids):
+                # Fast recovery using batchModify
+                return service.users().messages().batchModify(
+                    userId='me',
+                    body={
+                        'ids': batch_ids,
+                        'removeLabelIds': ['TRASH'],
+                        'addLabelIds': ['INBOX']  # Move back to inbox
+                    }
+                )
+
+            total_successful, total_failed, all_errors = self._run_batches_parallel(
+                batches, make_request, 'Fast recovery'
+            )
+
             return {
                 'status': 'completed',
                 'total': len(message_ids),
@@ -233,12 +256,12 @@ class EmailDeletionManager:
             }
             
         except Exception as e:
-            logger.error(f"Fast batch recover error: {e}")
+            logger.error("Fast batch recover error: %s", e)
             return {'error': {'message': str(e), 'type': 'fast_recovery_error'}}
         
 
 
-    def delete_by_query(self, search_query, max_emails=5000, permanent=False):
+    def delete_by_query(self, search_query, max_emails=5000, permanent=False, batch_size=1000):
         """Delete emails by search query instead of individual IDs"""
         try:
             service = self.service_manager.get_service()
@@ -272,14 +295,14 @@ class EmailDeletionManager:
                         break
                         
                 except Exception as e:
-                    logger.error(f"Search error: {e}")
+                    logger.error("Search error: %s", e)
                     break
             
-            logger.info(f"Found {len(all_message_ids)} emails for query: {search_query}")
+            logger.info("Found %s emails for query: %s", len(all_message_ids), search_query)
             
             # Step 2: Delete using fast batch method
             if all_message_ids:
-                return self.fast_batch_delete_emails(all_message_ids, permanent)
+                return self.fast_batch_delete_emails(all_message_ids, permanent, batch_size=batch_size)
             else:
                 return {
                     'status': 'completed',
@@ -290,12 +313,12 @@ class EmailDeletionManager:
                 }
                 
         except Exception as e:
-            logger.error(f"Delete by query error: {e}")
+            logger.error("Delete by query error: %s", e)
             return {'error': {'message': str(e), 'type': 'query_delete_error'}}
         
 
 
-    def recover_by_query(self, search_query, max_emails=5000):
+    def recover_by_query(self, search_query, max_emails=5000, batch_size=1000):
         """Recover emails from trash by search query"""
         try:
             service = self.service_manager.get_service()
@@ -330,14 +353,14 @@ class EmailDeletionManager:
                         break
                         
                 except Exception as e:
-                    logger.error(f"Trash search error: {e}")
+                    logger.error("Trash search error: %s", e)
                     break
             
-            logger.info(f"Found {len(all_message_ids)} emails in trash for query: {trash_query}")
+            logger.info("Found %s emails in trash for query: %s", len(all_message_ids), trash_query)
             
             # Step 2: Recover using fast batch method
             if all_message_ids:
-                return self.fast_batch_recover_emails(all_message_ids)
+                return self.fast_batch_recover_emails(all_message_ids, batch_size=batch_size)
             else:
                 return {
                     'status': 'completed',
@@ -348,16 +371,47 @@ class EmailDeletionManager:
                 }
                 
         except Exception as e:
-            logger.error(f"Recover by query error: {e}")
+            logger.error("Recover by query error: %s", e)
             return {'error': {'message': str(e), 'type': 'query_recover_error'}}
 
 
 
-@shared_task(bind=True)
-def delete_by_query_task(self, user_id, search_query, max_emails=5000, permanent=False):
-    """Delete emails by search query with undo tracking"""
+def _store_by_query_result(task_id, result):
+    """Final snapshot for a fire-and-forget by-query task"""
+    from .tasks import store_task_snapshot
+    if 'error' in result:
+        _store_by_query_failure(task_id, str(result['error']))
+        return
+    total = result.get('successful', 0)
+    store_task_snapshot(task_id, {
+        'status': 'SUCCESS',
+        'result': result,
+        'progress': {'current': total, 'total': total, 'message': 'Completed successfully'}
+    })
+
+
+def _store_by_query_failure(task_id, message):
+    from .tasks import store_task_snapshot
+    store_task_snapshot(task_id, {
+        'status': 'FAILURE',
+        'result': {'error': message}
+    })
+
+
+@shared_task(bind=True, ignore_result=True)
+def delete_by_query_task(self, user_id, search_query, max_emails=5000, permanent=False, batch_size=1000):
+    """Delete emails by search query with undo tracking.
+
+    Dispatched fire-and-forget - state goes straight to the task_state
+    cache key instead of the result backend, so polls never touch Celery.
+    """
     try:
         from .advanced_operations import UndoManager
+        from .tasks import store_task_snapshot
+        store_task_snapshot(self.request.id, {
+            'status': 'PROGRESS',
+            'progress': {'current': 0, 'total': max_emails, 'message': 'Searching for matching emails...'}
+        })
         user = User.objects.get(id=user_id)
         deletion_manager = EmailDeletionManager(user)
         
@@ -375,28 +429,121 @@ def delete_by_query_task(self, user_id, search_query, max_emails=5000, permanent
         result = deletion_manager.delete_by_query(
             search_query=search_query,
             max_emails=max_emails,
-            permanent=permanent
+            permanent=permanent,
+            batch_size=batch_size
         )
         
         # Add undo_id to result
         if 'error' not in result and 'error' not in undo_result:
             result['undo_id'] = undo_result.get('undo_id')
             result['undo_expires_hours'] = 24
-        
+
         # Track statistics
         if 'error' not in result:
             track_deletion_stats(user_id, result)
-        
+
+        _store_by_query_result(self.request.id, result)
         return result
-        
+
+    except User.DoesNotExist:
+        _store_by_query_failure(self.request.id, 'User not found')
+        return {'status': 'error', 'message': 'User not found'}
+    except Exception as e:
+        _store_by_query_failure(self.request.id, str(e))
+        return {'status': 'error', 'message': str(e)}
+
+
+
+# *************************Chord-based bulk dispatch**************************
+
+@shared_task(bind=True, acks_late=True, autoretry_for=(HttpError,), retry_backoff=True, max_retries=3)
+def modify_email_batch_task(self, user_id, message_ids, permanent=False, recover=False):
+    """Process one batch of message ids - a single Gmail batch call per task"""
+    try:
+        user = User.objects.get(id=user_id)
+        deletion_manager = EmailDeletionManager(user)
+
+        if recover:
+            return deletion_manager.fast_batch_recover_emails(message_ids)
+        return deletion_manager.fast_batch_delete_emails(message_ids, permanent=permanent)
+
     except User.DoesNotExist:
         return {'status': 'error', 'message': 'User not found'}
+
+
+@shared_task(bind=True)
+def finalize_bulk_operation_task(self, batch_results, user_id, recover=False, undo_id=None):
+    """Chord callback - merge per-batch results into the usual response shape"""
+    try:
+        total = successful = failed = 0
+        all_errors = []
+
+        for batch_result in batch_results:
+            if 'error' in batch_result or batch_result.get('status') == 'error':
+                all_errors.append(batch_result)
+                continue
+            total += batch_result.get('total', 0)
+            successful += batch_result.get('successful', 0)
+            failed += batch_result.get('failed', 0)
+            all_errors.extend(batch_result.get('errors', []))
+
+        result = {
+            'status': 'completed',
+            'total': total,
+            'successful': successful,
+            'failed': failed,
+            'errors': all_errors,
+            'action': 'recovered_from_trash' if recover else 'moved_to_trash'
+        }
+
+        if undo_id:
+            result['undo_id'] = undo_id
+
+        if not recover:
+            track_deletion_stats(user_id, result)
+
+        return result
+
     except Exception as e:
+        logger.error("Bulk finalize error: %s", e)
         return {'status': 'error', 'message': str(e)}
 
 
+def dispatch_bulk_operation(user, message_ids, permanent=False, recover=False, batch_size=500):
+    """Fan a bulk operation out as a chord of batch tasks.
+
+    Each batch is one Gmail batchModify/delete call processed by its own
+    worker task, so batches run in parallel instead of looping inside one
+    mega-task. Returns the chord callback's AsyncResult - its id is what
+    the status endpoint polls.
+    """
+    from .advanced_operations import UndoManager
 
-@shared_task(bind=True) 
+    undo_id = None
+    if not recover:
+        # Create undo point BEFORE deletion, same as the single-task path
+        undo_result = UndoManager(user).create_undo_point({
+            'type': 'bulk_delete',
+            'message_ids': message_ids,
+            'permanent': permanent
+        })
+        undo_id = undo_result.get('undo_id')
+
+    # 500 keeps each broker message ~20KB of ids and spreads work over
+    # more workers; batchModify itself caps at 1000 per call
+    batch_size = min(batch_size, 1000)
+    batches = [message_ids[i:i + batch_size] for i in range(0, len(message_ids), batch_size)]
+
+    header = [
+        modify_email_batch_task.s(user.id, batch, permanent=permanent, recover=recover)
+        for batch in batches
+    ]
+    callback = finalize_bulk_operation_task.s(user_id=user.id, recover=recover, undo_id=undo_id)
+
+    return chord(header)(callback)
+
+
+@shared_task(bind=True)
 def bulk_delete_emails_task(self, user_id, message_ids, permanent=False, batch_size=1000):
     """Fast bulk deletion with undo tracking"""
     try:
@@ -466,10 +613,10 @@ def track_deletion_stats(user_id, deletion_result):
         # Save updated stats
         cache.set(cache_key, stats, 86400 * 30)  # Cache for 30 days
         
-        logger.info(f"Updated deletion stats for user {user_id}: +{successful} emails")
+        logger.info("Updated deletion stats for user %s: +%s emails", user_id, successful)
         
     except Exception as e:
-        logger.error(f"Failed to track deletion stats: {e}")
+        logger.error("Failed to track deletion stats: %s", e)
 
 
 
@@ -492,26 +639,112 @@ def bulk_recover_emails_task(self, user_id, message_ids, batch_size=1000):
     except User.DoesNotExist:
         return {'status': 'error', 'message': 'User not found'}
     except Exception as e:
-        logger.error(f"Bulk recover task error: {e}")
+        logger.error("Bulk recover task error: %s", e)
         return {'status': 'error', 'message': str(e)}
     
 
 
-@shared_task(bind=True)
-def recover_by_query_task(self, user_id, search_query, max_emails=5000):
-    """Recover emails by search query"""
+@shared_task(bind=True, ignore_result=True)
+def recover_by_query_task(self, user_id, search_query, max_emails=5000, batch_size=1000):
+    """Recover emails by search query - fire-and-forget like the delete path"""
     try:
+        from .tasks import store_task_snapshot
+        store_task_snapshot(self.request.id, {
+            'status': 'PROGRESS',
+            'progress': {'current': 0, 'total': max_emails, 'message': 'Searching for matching emails...'}
+        })
         user = User.objects.get(id=user_id)
         deletion_manager = EmailDeletionManager(user)
-        
+
         result = deletion_manager.recover_by_query(
             search_query=search_query,
-            max_emails=max_emails
+            max_emails=max_emails,
+            batch_size=batch_size
         )
-        
+
+        _store_by_query_result(self.request.id, result)
         return result
-        
+
     except User.DoesNotExist:
+        _store_by_query_failure(self.request.id, 'User not found')
         return {'status': 'error', 'message': 'User not found'}
     except Exception as e:
-        return {'status': 'error', 'message': str(e)}
\ No newline at end of file
+        _store_by_query_failure(self.request.id, str(e))
+        return {'status': 'error', 'message': str(e)}
+
+@shared_task
+def refresh_expiring_tokens_task():
+    """Proactively refresh OAuth tokens that are about to expire.
+
+    Runs from Celery beat so user-facing views almost always find a warm
+    access token - the inline refresh in get_credentials_for_user stays
+    as a fallback for clock skew.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from datetime import timedelta
+    from django.utils import timezone
+    from .http import SESSION
+
+    try:
+        expiring = list(GoogleOAuthToken.objects.filter(
+            expiry__lt=timezone.now() + timedelta(minutes=5),
+            refresh_token__isnull=False
+        ).only('id', 'access_token', 'refresh_token', 'token_uri', 'client_id', 'client_secret', 'expiry'))
+
+        if not expiring:
+            return {'status': 'completed', 'refreshed': 0}
+
+        refreshed = []
+        dead_ids = []
+
+        def refresh_token(token):
+            # Everything stays inside the try - one malformed response must
+            # not abort the whole sweep when pool.map re-raises it
+            try:
+                response = SESSION.post(token.token_uri, data={
+                    'client_id': token.client_id,
+                    'client_secret': token.client_secret,
+                    'refresh_token': token.refresh_token,
+                    'grant_type': 'refresh_token'
+                })
+
+                if response.status_code in (400, 401):
+                    # invalid_grant / revoked - this refresh token will
+                    # never work again, so drop the row like the inline
+                    # refresh path does instead of re-POSTing it every run
+                    logger.warning("Refresh token dead for token %s, removing: %s", token.id, response.text)
+                    dead_ids.append(token.id)
+                    return
+
+                if response.status_code != 200:
+                    logger.warning("Proactive refresh failed for token %s: %s", token.id, response.text)
+                    return
+
+                payload = response.json()
+                access_token = payload.get('access_token')
+                if not access_token:
+                    logger.warning("No access_token in refresh response for token %s", token.id)
+                    return
+
+                token.access_token = access_token
+                token.expiry = timezone.now() + timedelta(seconds=payload.get('expires_in', 3600))
+                refreshed.append(token)
+
+            except Exception as e:
+                logger.warning("Proactive refresh error for token %s: %s", token.id, e)
+
+        # Pure network IO, so a small thread pool overlaps the round-trips
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(refresh_token, expiring))
+
+        if dead_ids:
+            GoogleOAuthToken.objects.filter(id__in=dead_ids).delete()
+        if refreshed:
+            GoogleOAuthToken.objects.bulk_update(refreshed, ['access_token', 'expiry'])
+
+        logger.info("Proactively refreshed %s/%s expiring tokens (%s dead)", len(refreshed), len(expiring), len(dead_ids))
+        return {'status': 'completed', 'refreshed': len(refreshed), 'expiring': len(expiring), 'removed': len(dead_ids)}
+
+    except Exception as e:
+        logger.error("Token refresh sweep error: %s", e)
+        return {'status': 'error', 'message': str(e)}
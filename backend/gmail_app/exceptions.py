@@ -0,0 +1,56 @@
+import logging
+from functools import wraps
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+from rest_framework.views import exception_handler
+
+logger = logging.getLogger(__name__)
+
+
+def json_error_boundary(message):
+    """Turn unexpected errors in a view method into a logged JSON 500.
+
+    For endpoints whose error payload names the failed operation ('Failed
+    to get rules', ...) - the decorator keeps that per-endpoint message
+    while the method body stays straight-line happy path.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(self, request, *args, **kwargs):
+            try:
+                return fn(self, request, *args, **kwargs)
+            except APIException:
+                # DRF's own exceptions (validation, throttling, ...) keep
+                # their status codes via the regular handler
+                raise
+            except Exception as e:
+                logger.exception(message)
+                return Response({
+                    'error': message,
+                    'details': str(e)
+                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return wrapper
+    return decorator
+
+
+def gmail_exception_handler(exc, context):
+    """Project-wide DRF exception handler.
+
+    Lets views drop their per-method try/except/str(e) wrappers - DRF's own
+    handler deals with API exceptions first, anything else becomes a logged
+    500 with the same error shape the views used to build by hand. The
+    traceback is only formatted when the logger actually emits it.
+    """
+    response = exception_handler(exc, context)
+    if response is not None:
+        return response
+
+    view = context.get('view')
+    view_name = view.__class__.__name__ if view else 'unknown view'
+    logger.exception('Unhandled error in %s', view_name)
+
+    return Response({
+        'status': 'error',
+        'error': str(exc)
+    }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
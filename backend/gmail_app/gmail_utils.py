@@ -1,4 +1,6 @@
+import hashlib
 import logging
+import threading
 import time
 from typing import Optional, Dict, Any
 from django.conf import settings
@@ -12,44 +14,82 @@ from .utils import get_credentials_for_user
 
 logger = logging.getLogger(__name__)
 
+# Cache of built Gmail services. Building one parses the ~200KB discovery
+# document, so reuse it across requests - keyed on the access token so the
+# entry invalidates itself when the token rotates. Thread-local because a
+# Resource wraps a single httplib2.Http, which must not be shared across
+# threads (same constraint _run_batches_parallel documents) and both the
+# threaded dev server and uvicorn's sync-view thread pool run views
+# concurrently.
+_service_cache = threading.local()
+_SERVICE_CACHE_MAX = 1024
+
+
+def _service_cache_map():
+    """This thread's service cache dict"""
+    try:
+        return _service_cache.services
+    except AttributeError:
+        _service_cache.services = {}
+        return _service_cache.services
+
+
+def _service_cache_key(user_id, access_token):
+    token_hash = hashlib.sha256(access_token.encode()).hexdigest()
+    return (user_id, token_hash)
+
+
 class GmailServiceManager:
     """Manager class for Gmail API service operations"""
-    
+
     def __init__(self, user):
         self.user = user
         self._service = None
         self._last_error = None
-    
+
     def get_service(self, force_refresh=False):
         """Get Gmail service with automatic token refresh"""
         if self._service and not force_refresh:
             return self._service
-        
+
         try:
             credentials = get_credentials_for_user(self.user)
             if not credentials:
-                logger.error(f"No valid credentials for user {self.user.username}")
+                logger.error("No valid credentials for user %s", self.user.username)
                 return None
-            
-            # Build Gmail service
-            self._service = build('gmail', 'v1', credentials=credentials)
-            
+
+            services = _service_cache_map()
+            cache_key = _service_cache_key(self.user.id, credentials.token)
+            cached = None if force_refresh else services.get(cache_key)
+            if cached is not None:
+                # Already built and connection-tested for this token
+                self._service = cached
+                return self._service
+
+            # Build Gmail service - static_discovery skips the discovery
+            # document fetch entirely
+            self._service = build('gmail', 'v1', credentials=credentials, static_discovery=True)
+
             # Test connection with a lightweight call
             self._test_connection()
-            
-            logger.info(f"Gmail service created successfully for user {self.user.username}")
+
+            if len(services) >= _SERVICE_CACHE_MAX:
+                services.pop(next(iter(services)))
+            services[cache_key] = self._service
+
+            logger.info("Gmail service created successfully for user %s", self.user.username)
             return self._service
             
         except RefreshError as e:
-            logger.error(f"Token refresh failed for user {self.user.username}: {e}")
+            logger.error("Token refresh failed for user %s: %s", self.user.username, e)
             self._handle_token_error()
             return None
         except HttpError as e:
-            logger.error(f"Gmail API error for user {self.user.username}: {e}")
+            logger.error("Gmail API error for user %s: %s", self.user.username, e)
             self._last_error = str(e)
             return None
         except Exception as e:
-            logger.error(f"Unexpected error creating Gmail service for user {self.user.username}: {e}")
+            logger.error("Unexpected error creating Gmail service for user %s: %s", self.user.username, e)
             return None
     
     def _test_connection(self):
@@ -66,10 +106,10 @@ class GmailServiceManager:
         """Handle token-related errors"""
         try:
             # Remove invalid tokens
-            GoogleOAuthToken.objects.filter(user=self.user).delete()
-            logger.info(f"Removed invalid tokens for user {self.user.username}")
+            GoogleOAuthToken.objects.filter(user_id=self.user.pk).delete()
+            logger.info("Removed invalid tokens for user %s", self.user.username)
         except Exception as e:
-            logger.error(f"Failed to clean up invalid tokens for user {self.user.username}: {e}")
+            logger.error("Failed to clean up invalid tokens for user %s: %s", self.user.username, e)
     
     def is_connected(self):
         """Check if Gmail service is connected and working"""
@@ -113,7 +153,7 @@ def test_gmail_connectivity(user):
         }
         
     except Exception as e:
-        logger.error(f"Gmail connectivity test failed for user {user.username}: {e}")
+        logger.error("Gmail connectivity test failed for user %s: %s", user.username, e)
         return {
             'connected': False,
             'error': str(e),
@@ -178,14 +218,14 @@ def retry_gmail_operation(func, max_retries=3, delay=1):
             if e.resp.status == 429:  # Rate limit
                 if attempt < max_retries - 1:
                     sleep_time = delay * (2 ** attempt)
-                    logger.warning(f"Rate limited, retrying in {sleep_time} seconds (attempt {attempt + 1})")
+                    logger.warning("Rate limited, retrying in %s seconds (attempt %s)", sleep_time, attempt + 1)
                     time.sleep(sleep_time)
                     continue
             raise
         except Exception as e:
             if attempt < max_retries - 1:
                 sleep_time = delay * (2 ** attempt)
-                logger.warning(f"Operation failed, retrying in {sleep_time} seconds: {e}")
+                logger.warning("Operation failed, retrying in %s seconds: %s", sleep_time, e)
                 time.sleep(sleep_time)
                 continue
             raise
@@ -194,7 +234,11 @@ def retry_gmail_operation(func, max_retries=3, delay=1):
 
 def get_credentials_for_user(user):
     try:
-        token = GoogleOAuthToken.objects.get(user=user)
+        # Same credential-field projection as utils.get_credentials_for_user
+        token = GoogleOAuthToken.objects.only(
+            'user_id', 'access_token', 'refresh_token', 'token_uri',
+            'client_id', 'client_secret', 'scopes', 'expiry'
+        ).get(user_id=user.pk)
 
         credentials = Credentials(
             token=token.access_token,
@@ -208,7 +252,7 @@ def get_credentials_for_user(user):
         # Enhanced token refresh with better error handling
         if credentials.expired and credentials.refresh_token:
             try:
-                logger.info(f"Refreshing expired token for user {user.username}")
+                logger.info("Refreshing expired token for user %s", user.username)
                 credentials.refresh(Request())
                 
                 # Update stored token
@@ -217,32 +261,32 @@ def get_credentials_for_user(user):
                     token.expiry = credentials.expiry
                 token.save()
                 
-                logger.info(f"Token refreshed successfully for user {user.username}")
+                logger.info("Token refreshed successfully for user %s", user.username)
                 
             except RefreshError as e:
                 # Only handle actual auth failures (invalid refresh token)
                 if 'invalid_grant' in str(e) or 'refresh_token' in str(e).lower():
-                    logger.error(f"Refresh token invalid for user {user.username}: {e}")
+                    logger.error("Refresh token invalid for user %s: %s", user.username, e)
                     # Delete invalid tokens
                     token.delete()
                     return None
                 else:
                     # Temporary network/server error - retry later
-                    logger.warning(f"Temporary refresh error for user {user.username}: {e}")
+                    logger.warning("Temporary refresh error for user %s: %s", user.username, e)
                     # Return current credentials - may still work for a short time
                     return credentials
                     
             except Exception as e:
                 # Network or other temporary errors
-                logger.warning(f"Token refresh failed (temporary) for user {user.username}: {e}")
+                logger.warning("Token refresh failed (temporary) for user %s: %s", user.username, e)
                 # Return current credentials - may still work
                 return credentials
         
         return credentials
     
     except GoogleOAuthToken.DoesNotExist:
-        logger.warning(f"No OAuth token found for user {user.username}")
+        logger.warning("No OAuth token found for user %s", user.username)
         return None
     except Exception as e:
-        logger.error(f"Error getting credentials for user {user.username}: {e}")
+        logger.error("Error getting credentials for user %s: %s", user.username, e)
         return None
\ No newline at end of file
@@ -0,0 +1,12 @@
+import requests
+from requests.adapters import HTTPAdapter, Retry
+
+# One pooled session shared by everything that talks HTTP outside the Google
+# API client (token exchange, revocation). Reusing connections skips the
+# TCP+TLS setup that otherwise happens on every OAuth round-trip.
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=3, backoff_factor=0.2),
+))
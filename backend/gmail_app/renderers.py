@@ -0,0 +1,31 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if orjson is not None:
+    class ORJSONRenderer(BaseRenderer):
+        """JSON renderer backed by orjson - several times faster to encode
+        than the stdlib json used by DRF's default renderer, which matters
+        once responses carry hundreds of preview/search messages.
+        """
+        media_type = 'application/json'
+        format = 'json'
+        charset = None
+        render_style = 'binary'
+
+        def render(self, data, accepted_media_type=None, renderer_context=None):
+            if data is None:
+                return b''
+
+            # default=str covers Decimal and lazy strings; datetimes are
+            # native orjson
+            return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+else:
+    class ORJSONRenderer(JSONRenderer):
+        """orjson isn't installed - fall back to the stock DRF renderer"""
+        pass
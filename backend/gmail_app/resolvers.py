@@ -0,0 +1,126 @@
+import re
+from functools import lru_cache
+
+from django.urls.exceptions import Resolver404
+from django.urls.resolvers import ResolverMatch, RoutePattern, URLPattern, URLResolver
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+
+# Adding logger for enchanced debugging
+import logging
+logger = logging.getLogger(__name__)
+
+
+class HashDispatchURLResolver(URLResolver):
+    """URLResolver that resolves static routes with a single dict lookup.
+
+    Django's default resolver walks urlpatterns in order and runs a compiled
+    regex per entry until one matches, so every request pays O(N) regex
+    attempts. Most of our routes are static literals (no <...> converters),
+    so we key those on the literal path and only fall back to the normal
+    linear scan for the dynamic routes.
+    """
+
+    @cached_property
+    def _static_map(self):
+        """Map of literal route -> URLPattern, built once on first resolve"""
+        mapping = {}
+        for pattern in self.url_patterns:
+            # Only plain endpoints qualify - includes keep matching further
+            if isinstance(pattern, URLPattern):
+                route = str(pattern.pattern)
+                if '<' not in route:
+                    mapping[route] = pattern
+        return mapping
+
+    @cached_property
+    def _dynamic_gate(self):
+        """One combined regex over every non-static entry, compiled once.
+
+        A path that misses the static map and fails this single alternation
+        can be 404'd immediately instead of being tried against each dynamic
+        pattern in turn. Named groups are demoted to plain groups since the
+        same parameter name appears in several routes.
+        """
+        parts = []
+        for pattern in self.url_patterns:
+            if isinstance(pattern, URLPattern) and str(pattern.pattern) in self._static_map:
+                continue
+            parts.append('(?:%s)' % re.sub(r'\(\?P<[^>]+>', '(?:', pattern.pattern.regex.pattern))
+        if not parts:
+            return None
+        return re.compile('|'.join(parts))
+
+    def resolve(self, path):
+        path = str(path)
+        match = self.pattern.match(path)
+        if match:
+            new_path, args, kwargs = match
+            pattern = self._static_map.get(new_path)
+            if pattern is not None:
+                sub_match = pattern.resolve(new_path)
+                if sub_match:
+                    return ResolverMatch(
+                        sub_match.func,
+                        sub_match.args,
+                        {**kwargs, **self.default_kwargs, **sub_match.kwargs},
+                        sub_match.url_name,
+                        [self.app_name] + sub_match.app_names if self.app_name else sub_match.app_names,
+                        [self.namespace] + sub_match.namespaces if self.namespace else sub_match.namespaces,
+                        str(self.pattern) + str(sub_match.route),
+                        captured_kwargs=sub_match.captured_kwargs,
+                        # Parent resolvers merge this with **, so it must be
+                        # a mapping even when the sub-pattern had none
+                        extra_kwargs={**self.default_kwargs, **(sub_match.extra_kwargs or {})},
+                    )
+            # Static miss - a single combined regex decides whether the
+            # dynamic scan below can possibly match
+            gate = self._dynamic_gate
+            if gate is None or gate.match(new_path) is None:
+                raise Resolver404({'tried': [[p] for p in self.url_patterns], 'path': new_path})
+        # Dynamic routes (and anything unexpected) use the normal scan
+        return super().resolve(path)
+
+
+@lru_cache(maxsize=None)
+def _resolved_view(dotted_path, initkwargs):
+    """Import the view class and build its as_view() callable, once"""
+    view_class = import_string(dotted_path)
+    return view_class.as_view(**dict(initkwargs))
+
+
+@lru_cache(maxsize=None)
+def _lazy_view_wrapper(dotted_path, frozen):
+    def view(request, *args, **kwargs):
+        return _resolved_view(dotted_path, frozen)(request, *args, **kwargs)
+
+    # Our views are DRF APIViews, which as_view() marks csrf_exempt - the
+    # wrapper has to carry that flag for CsrfViewMiddleware
+    view.csrf_exempt = True
+    return view
+
+
+def lazy_view(dotted_path, **initkwargs):
+    """Return a view callable that defers importing the view class until the
+    first request that hits it.
+
+    Referencing views by dotted string keeps the heavy view module (Google
+    API client, JWT, Gmail helpers) out of worker boot, shrinking cold-start
+    time and per-process RSS. The first hit pays the import; after that
+    _resolved_view is a cached dict lookup.
+
+    The wrapper itself is cached too, so mounting the same view on several
+    routes (e.g. the two undo/ entries) shares one callable object instead
+    of building a fresh closure per path() call - also keeps repeated url
+    module imports (autoreload, test discovery) from re-doing the work.
+    """
+    return _lazy_view_wrapper(dotted_path, tuple(sorted(initkwargs.items())))
+
+
+def hash_dispatch_path(route, urlconf_name):
+    """Drop-in replacement for path(route, include(urlconf_name)) that mounts
+    the included urlconf behind a HashDispatchURLResolver"""
+    return HashDispatchURLResolver(
+        RoutePattern(route, is_endpoint=False),
+        urlconf_name,
+    )
@@ -74,4 +74,22 @@ This serializer handles starting the Google OAuth flow.'''
 
 class GoogleAuthURLSerializer(serializers.Serializer):
     auth_url = serializers.URLField()
-    state = serializers.CharField()
\ No newline at end of file
+    state = serializers.CharField()
+
+
+'''GmailSearchParamsSerializer - search query params
+Validates and coerces the search endpoint's query parameters in one pass,
+instead of ad-hoc int()/strip() calls inside the view.'''
+
+class GmailSearchParamsSerializer(serializers.Serializer):
+    q = serializers.CharField()
+    page_size = serializers.IntegerField(default=20, min_value=1, max_value=500)
+    page_token = serializers.CharField(required=False, default=None, allow_null=True)
+
+    def validate_q(self, value):
+        if not value.strip():
+            raise serializers.ValidationError('Search query (q) parameter is required')
+        return value
+
+class StatsQuerySerializer(serializers.Serializer):
+    days_back = serializers.IntegerField(default=30, min_value=1, max_value=365)
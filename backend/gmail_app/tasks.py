@@ -0,0 +1,152 @@
+import logging
+from celery import shared_task
+from celery.result import AsyncResult
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Registry of dispatched task ids the status poller keeps fresh
+INFLIGHT_TASKS_KEY = 'inflight_task_ids'
+
+# How long a cached snapshot stays valid between poller runs
+TASK_STATE_TTL = 30
+FINISHED_STATE_TTL = 3600
+
+FINISHED_STATES = ('SUCCESS', 'FAILURE', 'REVOKED')
+
+
+def task_state_key(task_id):
+    return f'task_state_{task_id}'
+
+
+def store_task_snapshot(task_id, snapshot, ttl=FINISHED_STATE_TTL):
+    """Write a task-owned state snapshot - same key/shape the poller uses.
+
+    Tasks dispatched with ignore_result=True report through this instead
+    of the result backend, so the status endpoint keeps working while the
+    backend never stores their meta at all.
+    """
+    snapshot.setdefault('task_id', task_id)
+    cache.set(task_state_key(task_id), snapshot, ttl)
+
+
+def register_inflight_task(task_id):
+    """Track a dispatched task id so the poller refreshes its cached state"""
+    try:
+        task_ids = cache.get(INFLIGHT_TASKS_KEY, [])
+        if task_id not in task_ids:
+            task_ids.append(task_id)
+            # Keep the registry bounded
+            cache.set(INFLIGHT_TASKS_KEY, task_ids[-200:], 86400)
+    except Exception as e:
+        logger.error("Failed to register inflight task %s: %s", task_id, e)
+
+
+def snapshot_task_state(task_id):
+    """Query the Celery result backend once and cache the response payload"""
+    result = AsyncResult(task_id)
+
+    # Snapshot state and info into locals - each .state/.info access on a
+    # non-ready result re-fetches the meta from the backend
+    state = result.state
+    info = result.info
+
+    if state == 'PENDING':
+        snapshot = {
+            'task_id': task_id,
+            'status': 'PENDING',
+            'progress': {
+                'current': 0,
+                'total': 0,
+                'message': 'Task is waiting to start'
+            }
+        }
+    elif state == 'PROGRESS':
+        info = info if isinstance(info, dict) else {}
+        snapshot = {
+            'task_id': task_id,
+            'status': 'PROGRESS',
+            'progress': {
+                'current': info.get('current', 0),
+                'total': info.get('total', 0),
+                'message': info.get('message', 'Processing...')
+            }
+        }
+    elif state == 'SUCCESS':
+        total = info.get('total', 0) if isinstance(info, dict) else 0
+        snapshot = {
+            'task_id': task_id,
+            'status': 'SUCCESS',
+            'result': info,
+            'progress': {
+                'current': total,
+                'total': total,
+                'message': 'Completed successfully'
+            }
+        }
+    else:  # FAILURE
+        snapshot = {
+            'task_id': task_id,
+            'status': 'FAILURE',
+            'result': {
+                'error': str(info) if info else 'Unknown error'
+            }
+        }
+
+    ttl = FINISHED_STATE_TTL if snapshot['status'] in FINISHED_STATES else TASK_STATE_TTL
+    cache.set(task_state_key(task_id), snapshot, ttl)
+    return snapshot
+
+
+@shared_task
+def fetch_gmail_profile_task(user_id):
+    """Warm the cached Gmail profile after OAuth instead of blocking the redirect"""
+    from django.contrib.auth.models import User
+    from .utils import create_gmail_service
+
+    try:
+        user = User.objects.get(id=user_id)
+        gmail_service = create_gmail_service(user)
+        if not gmail_service:
+            return {'status': 'error', 'message': 'Gmail service not available'}
+
+        profile = gmail_service.users().getProfile(userId='me').execute()
+        # Same key GoogleTokenStatusView reads, so the dashboard poll
+        # picks the address up without another Google round-trip
+        cache.set(f'gmail_profile_{user_id}', profile, 60)
+
+        logger.info("Gmail profile warmed for user %s: %s", user.username, profile.get('emailAddress'))
+        return {'status': 'completed', 'email_address': profile.get('emailAddress')}
+
+    except User.DoesNotExist:
+        logger.error("Profile fetch for unknown user id %s", user_id)
+        return {'status': 'error', 'message': 'User not found'}
+    except Exception as e:
+        logger.error("Gmail profile fetch failed for user id %s: %s", user_id, e)
+        return {'status': 'error', 'message': str(e)}
+
+
+@shared_task
+def poll_task_statuses():
+    """Periodically refresh cached states for in-flight tasks.
+
+    Status polls from the frontend then read Redis only, instead of paying
+    a result-backend round-trip per poll.
+    """
+    try:
+        task_ids = cache.get(INFLIGHT_TASKS_KEY, [])
+        if not task_ids:
+            return {'status': 'completed', 'polled': 0}
+
+        still_running = []
+        for task_id in task_ids:
+            snapshot = snapshot_task_state(task_id)
+            if snapshot['status'] not in FINISHED_STATES:
+                still_running.append(task_id)
+
+        cache.set(INFLIGHT_TASKS_KEY, still_running, 86400)
+        return {'status': 'completed', 'polled': len(task_ids)}
+
+    except Exception as e:
+        logger.error("Task status polling error: %s", e)
+        return {'status': 'error', 'message': str(e)}
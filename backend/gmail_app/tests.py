@@ -1,3 +1,32 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
+from django.urls import resolve
+from django.urls.exceptions import Resolver404
 
-# Create your tests here.
+
+class HashDispatchResolverTests(SimpleTestCase):
+    """Smoke tests for the custom resolver both route kinds go through"""
+
+    def test_static_routes_resolve(self):
+        # Hit the fast static-map path at every nesting level
+        for path, url_name in [
+            ('/api/v1/auth/login/', 'user_login'),
+            ('/api/v1/profile/', 'user_profile'),
+            ('/api/v1/gmail/labels/', 'gmail_labels'),
+            ('/api/v1/gmail/emails/mutate/', 'email_mutate'),
+        ]:
+            match = resolve(path)
+            self.assertEqual(match.url_name, url_name)
+
+    def test_dynamic_routes_resolve(self):
+        # These miss the static map and fall through to the normal scan
+        match = resolve('/api/v1/tasks/abc-123/')
+        self.assertEqual(match.url_name, 'task_status')
+        self.assertEqual(match.kwargs, {'task_id': 'abc-123'})
+
+        match = resolve('/api/v1/gmail/rules/rule_1_0/execute/')
+        self.assertEqual(match.url_name, 'execute_rule')
+        self.assertEqual(match.kwargs, {'rule_id': 'rule_1_0'})
+
+    def test_unknown_route_404s(self):
+        with self.assertRaises(Resolver404):
+            resolve('/api/v1/gmail/zzz/')
@@ -0,0 +1,27 @@
+from django.urls import path
+from .resolvers import lazy_view
+
+# All auth/* routes, mounted at auth/ from urls.py so the resolver only
+# scans this group after a single prefix check. Routes are declared as data
+# and expanded once at import; views stay dotted strings so the view module
+# is only imported on first hit.
+
+# (route, dotted view, url name)
+ROUTES = (
+    # JWT realted apis
+    ('register/', 'gmail_app.views.UserRegistrationView', 'user_register'),
+    ('login/', 'gmail_app.views.UserLoginView', 'user_login'),
+    ('logout/', 'gmail_app.views.UserLogoutView', 'user_logout'),
+    ('refresh/', 'gmail_app.views.FastTokenRefreshView', 'token_refresh'),
+
+    #OAuth related apis
+    ('google/url/', 'gmail_app.views.GoogleAuthURLView', 'google_auth_url'),
+    ('google/callback/', 'gmail_app.views.GoogleOAuthCallbackView', 'google_callback'),
+    ('google/status/', 'gmail_app.views.GoogleTokenStatusView', 'google_token_status'),
+    ('google/revoke/', 'gmail_app.views.GoogleTokenRevokeView', 'google_token_revoke'),
+)
+
+urlpatterns = [
+    path(route, lazy_view(view), name=name)
+    for route, view, name in ROUTES
+]
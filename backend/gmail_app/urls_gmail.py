@@ -0,0 +1,53 @@
+from django.urls import path, re_path
+from .resolvers import lazy_view
+
+# All gmail/* routes, mounted at gmail/ from urls.py so the resolver only
+# scans this group after a single prefix check. Routes are declared as data
+# and expanded once at import; views stay dotted strings so the view module
+# is only imported on first hit.
+
+_mutation_view = 'gmail_app.views.EmailMutationView'
+
+# (route, dotted view, url name, view initkwargs)
+ROUTES = (
+    #Gmail connectivity test apis
+    ('connectivity/', 'gmail_app.views.GmailConnectivityTestView', 'gmail_connectivity', None),
+
+    #Gmail operations related apis
+    ('emails/', 'gmail_app.views.GmailEmailListView', 'gmail_emails', None),
+    ('emails/metadata/', 'gmail_app.views.GmailEmailMetadataView', 'gmail_email_metadata', None),
+    ('search/', 'gmail_app.views.GmailSearchView', 'gmail_search', None),
+    ('labels/', 'gmail_app.views.GmailLabelsView', 'gmail_labels', None),
+
+    #Email operations related apis - all served by one dispatch view, op comes
+    #from the request body on the mutate route and is pinned on the legacy routes
+    ('emails/mutate/', _mutation_view, 'email_mutate', None),
+    ('emails/delete/<gid:message_id>/', _mutation_view, 'email_delete', {'op': 'delete'}),
+    ('emails/recover/<gid:message_id>/', _mutation_view, 'email_recover', {'op': 'recover'}),
+    ('emails/bulk-delete/', _mutation_view, 'bulk_email_delete', {'op': 'bulk_delete'}),
+    ('emails/bulk-recover/', _mutation_view, 'bulk_email_recover', {'op': 'bulk_recover'}),
+
+    #Deletion?recovery bt query for testing
+    ('delete-by-query/', _mutation_view, 'query_email_delete', {'op': 'delete_by_query'}),
+    ('recover-by-query/', _mutation_view, 'query_email_recover', {'op': 'recover_by_query'}),
+
+    #Advance operations -> Preview before deletion, Undo etc related Apis
+    ('preview/', 'gmail_app.views.EmailPreviewView', 'email_preview', None),
+    ('rules/', 'gmail_app.views.DeletionRulesView', 'deletion_rules', None),
+    ('rules/<ruleid:rule_id>/execute/', 'gmail_app.views.ExecuteRuleView', 'execute_rule', None),
+    ('stats/', 'gmail_app.views.EmailStatsView', 'email_stats', None),
+
+    # New endpoint for Gmail email count
+    ('count/', 'gmail_app.views.GmailEmailCountView', 'gmail_email_count', None),
+)
+
+urlpatterns = [
+    path(route, lazy_view(view, **(initkwargs or {})), name=name)
+    for route, view, name, initkwargs in ROUTES
+]
+
+# One mount for both undo routes - undo_id is optional (GET lists undo
+# points, POST with an id executes one)
+urlpatterns.append(
+    re_path(r'^undo/(?:(?P<undo_id>undo_\d+_\d+)/)?$', lazy_view('gmail_app.views.UndoOperationView'), name='undo_operations'),
+)
@@ -1,4 +1,5 @@
 import json
+from functools import lru_cache
 from google_auth_oauthlib.flow import Flow
 from django.conf import settings 
 from .models import GoogleOAuthToken
@@ -6,34 +7,42 @@ from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-import requests
+from .http import SESSION
 
 # Adding logger for enchanced debugging
 import logging
 logger = logging.getLogger(__name__)
 
 
+"""Build the OAuth client config once - settings never change at runtime"""
+@lru_cache(maxsize=1)
+def get_google_client_config():
+    return {
+        "web": {
+            "client_id": settings.GOOGLE_OAUTH2_CLIENT_ID,
+            "client_secret": settings.GOOGLE_OAUTH2_CLIENT_SECRET,
+            "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+            "token_uri": "https://oauth2.googleapis.com/token",
+            "redirect_uris": [settings.GOOGLE_OAUTH2_REDIRECT_URI]
+        }
+    }
+
+
 """Create Google OAuth2 flow"""
 def get_google_auth_flow():
 
     try:
+        # Flow itself stays per-request (it carries oauthlib session state),
+        # but it is built from the cached client config
         flow = Flow.from_client_config(
-            {
-                "web": {
-                    "client_id": settings.GOOGLE_OAUTH2_CLIENT_ID,
-                    "client_secret": settings.GOOGLE_OAUTH2_CLIENT_SECRET,
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                    "redirect_uris": [settings.GOOGLE_OAUTH2_REDIRECT_URI]
-                }
-            },
+            get_google_client_config(),
             scopes=settings.GMAIL_SCOPES
 
         )
         flow.redirect_uri = settings.GOOGLE_OAUTH2_REDIRECT_URI
         return flow
     except Exception as e:
-        logger.error(f'Failed to create OAuth flow : {e}')
+        logger.error('Failed to create OAuth flow : %s', e)
         return None
 
 
@@ -53,7 +62,7 @@ def generate_auth_url(user_id):
         )
         return auth_url, state
     except Exception as e:
-        logger.error(f"Failed to generate auth URL: {e}")
+        logger.error("Failed to generate auth URL: %s", e)
         return None, None
 
 
@@ -69,7 +78,7 @@ def exchange_code_for_tokens(code):
         'redirect_uri': settings.GOOGLE_OAUTH2_REDIRECT_URI
     }
     
-    response = requests.post(token_url, data=token_data)
+    response = SESSION.post(token_url, data=token_data)
     
     if response.status_code != 200:
         raise Exception(f'Token exchange failed: {response.text}')
@@ -78,9 +87,17 @@ def exchange_code_for_tokens(code):
 
 
 """Get valid Google credentials for a user"""
-def get_credentials_for_user(user):
+def get_credentials_for_user(user, token=None):
     try:
-        token = GoogleOAuthToken.objects.get(user=user)
+        # Callers that already hold the token row pass it in so we don't
+        # re-SELECT it here
+        if token is None:
+            # Narrow the SELECT to the credential fields (user_id included so
+            # Django doesn't re-query to stitch the FK back)
+            token = GoogleOAuthToken.objects.only(
+                'user_id', 'access_token', 'refresh_token', 'token_uri',
+                'client_id', 'client_secret', 'scopes', 'expiry'
+            ).get(user_id=user.pk)
 
         credentials = Credentials(
             token=token.access_token,
@@ -102,41 +119,55 @@ def get_credentials_for_user(user):
                     token.expiry = credentials.expiry
                 token.save()
                 
-                logger.info(f"Token refreshed for user {user.username}")
+                logger.info("Token refreshed for user %s", user.username)
                 
             except Exception as e:
-                logger.error(f"Token refresh failed for user {user.username}: {e}")
+                logger.error("Token refresh failed for user %s: %s", user.username, e)
                 return None
         
         return credentials
     
     except GoogleOAuthToken.DoesNotExist:
-        logger.warning(f"No OAuth token found for user {user.username}")
+        logger.warning("No OAuth token found for user %s", user.username)
         return None
     except Exception as e:
-        logger.error(f"Error getting credentials for user {user.username}: {e}")
+        logger.error("Error getting credentials for user %s: %s", user.username, e)
         return None
     
 
 
 """Create Gmail API service for a user"""
-def create_gmail_service(user):
-    credentials = get_credentials_for_user(user)
+def create_gmail_service(user, token=None):
+    credentials = get_credentials_for_user(user, token=token)
     if not credentials:
         return None
-    
-    # return build('gmail', 'v1', credentials=credentials)
+
+    # Shared with GmailServiceManager - a cache hit reuses the service and
+    # its underlying keep-alive connection, skipping the TLS handshake and
+    # the getProfile test. Imported here to avoid a module import cycle.
+    from .gmail_utils import _service_cache_map, _service_cache_key, _SERVICE_CACHE_MAX
+
+    services = _service_cache_map()
+    cache_key = _service_cache_key(user.id, credentials.token)
+    cached = services.get(cache_key)
+    if cached is not None:
+        return cached
 
     try:
-        service = build('gmail', 'v1', credentials=credentials)
+        service = build('gmail', 'v1', credentials=credentials, static_discovery=True)
         # Test the connection
         service.users().getProfile(userId='me').execute()
+
+        if len(services) >= _SERVICE_CACHE_MAX:
+            services.pop(next(iter(services)))
+        services[cache_key] = service
+
         return service
     except HttpError as e:
-        logger.error(f"Gmail API error for user {user.username}: {e}")
+        logger.error("Gmail API error for user %s: %s", user.username, e)
         return None
     except Exception as e:
-        logger.error(f"Failed to create Gmail service for user {user.username}: {e}")
+        logger.error("Failed to create Gmail service for user %s: %s", user.username, e)
         return None
     
     
@@ -147,14 +178,13 @@ def revoke_user_tokens(user):
         if credentials:
             # Revoke token with Google
             revoke_url = f"https://oauth2.googleapis.com/revoke?token={credentials.token}"
-            import requests
-            requests.post(revoke_url)
+            SESSION.post(revoke_url)
         
         # Delete from database
-        GoogleOAuthToken.objects.filter(user=user).delete()
-        logger.info(f"OAuth tokens revoked for user {user.username}")
+        GoogleOAuthToken.objects.filter(user_id=user.pk).delete()
+        logger.info("OAuth tokens revoked for user %s", user.username)
         return True
     except Exception as e:
-        logger.error(f"Failed to revoke tokens for user {user.username}: {e}")
+        logger.error("Failed to revoke tokens for user %s: %s", user.username, e)
         return False
                                                               
\ No newline at end of file
@@ -5,6 +5,13 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Run with the uvloop-backed uvicorn worker for the Gmail fan-out endpoints:
+
+    uvicorn gmail_purge_backend.asgi:application --workers 4
+
+Django wraps the sync DRF views in asgiref's sync_to_async thread
+executor, so long Gmail API waits stop pinning a whole worker process.
 """
 
 import os
@@ -31,6 +31,10 @@ DEBUG = True
 
 ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
 
+# Pure API backend - every route is declared with its trailing slash, so
+# skip CommonMiddleware's extra resolver pass + redirect on 404s
+APPEND_SLASH = False
+
 
 # Application definition
 
@@ -143,14 +147,23 @@ REST_FRAMEWORK = {
 
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
-    
+
+    'EXCEPTION_HANDLER': 'gmail_app.exceptions.gmail_exception_handler',
+
+    'DEFAULT_RENDERER_CLASSES': [
+        'gmail_app.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+
     'DEFAULT_THROTTLE_CLASSES': [
         'rest_framework.throttling.AnonRateThrottle',
         'rest_framework.throttling.UserRateThrottle'
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',
-        'user': '1000/hour'
+        'user': '1000/hour',
+        # By-query bulk deletion/recovery - see EmailMutationView
+        'bulk_query': '10/hour',
     },
 }
 
@@ -188,6 +201,15 @@ GMAIL_SCOPES = [
 #OAuth2 redirect URI
 GOOGLE_OAUTH2_REDIRECT_URI = os.getenv('GOOGLE_REDIRECT_URI')
 
+# Cache - Redis so cached previews/rules/undo points are shared across
+# workers instead of living in per-process memory
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/1',
+    }
+}
+
 # Celery Configuration
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
@@ -200,6 +222,26 @@ CELERY_ENABLE_UTC = True
 # Task result expiration
 CELERY_RESULT_EXPIRES = 3600
 
+# Ack after the task finishes so long-running bulk ops survive worker crashes
+CELERY_TASK_ACKS_LATE = True
+
+# Background poller keeps task-state snapshots warm in the cache so the
+# status endpoint never hits the result backend directly
+CELERY_BEAT_SCHEDULE = {
+    'poll-task-statuses': {
+        'task': 'gmail_app.tasks.poll_task_statuses',
+        'schedule': 2.0,
+    },
+    'refresh-expiring-tokens': {
+        'task': 'gmail_app.email_operations.refresh_expiring_tokens_task',
+        'schedule': 60.0,
+    },
+    'refresh-deletion-stats': {
+        'task': 'gmail_app.advanced_operations.refresh_deletion_stats',
+        'schedule': 86400.0,
+    },
+}
+
 
 #For react testinggg
 # Add CORS settings
@@ -20,10 +20,13 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
+from gmail_app.resolvers import hash_dispatch_path
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/v1/', include('gmail_app.urls')),
+    # Mounted behind a hash-dispatch resolver so static api routes resolve
+    # with one dict lookup instead of a linear regex scan
+    hash_dispatch_path('api/v1/', 'gmail_app.urls'),
     # path('api/v1/auth/login/', TokenObtainPairView.as_view(), name = 'token_obtain_pair'),
     # path('api/v1/auth/refresh/', TokenRefreshView.as_view(), name = 'token_refresh'),
 